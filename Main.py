@@ -39,7 +39,7 @@ class userInterface(QMainWindow):
     def plotGraph(self):
         '''
         Grabbing the parameters from the sliders and text of GUI
-        Some parameters are manually definied such as epsilon, mu, iterations
+        Some parameters are manually definied such as epsilon, mu, iterations, solver, boundary
         This would be troubling but my skills at making a decent GUI are limited,
         it might be improved at a future update but for manually changing the 
         paramters over here is the only option. Apologies.
@@ -57,6 +57,8 @@ class userInterface(QMainWindow):
         epsilon=1
         mu=1
         iterations=8
+        solver='direct'
+        boundary='multipole'
         meshSide=3
         '''
         Starting the computation based on the above paramters
@@ -66,8 +68,8 @@ class userInterface(QMainWindow):
         vectorLength,booleanNormalize,booleanColour)
         self.graphWidget.graph.updateFields(chargePosExpr,chargeExpr,currentPosExpr,currentExpr)
         self.Exprs=(chargePosExpr,chargeExpr,currentPosExpr,currentExpr)
-        self.graphWidget.graph.updateData(epsilon,mu,iterations)
-        self.variables=(epsilon,mu,iterations)
+        self.graphWidget.graph.updateData(epsilon,mu,iterations,solver,boundary)
+        self.variables=(epsilon,mu,iterations,solver,boundary)
         self.graphWidget.graph.processData()
         self.graphWidget.graph.show()
         self.update()
@@ -87,11 +89,11 @@ class TimeStepper(QRunnable):
     def run(self):
         for i in range(10):
             Exprs=self.plotter.Exprs
-            epsilon,mu,iterations=self.plotter.variables
+            epsilon,mu,iterations,solver,boundary=self.plotter.variables
             self.plotter.graphWidget.graph.updateTime()
             self.plotter.graphWidget.graph.updateFields(Exprs[0],Exprs[1],Exprs[2],
                     Exprs[3])
-            self.plotter.graphWidget.graph.updateData(epsilon,mu,iterations)
+            self.plotter.graphWidget.graph.updateData(epsilon,mu,iterations,solver,boundary)
             self.plotter.graphWidget.graph.processData()
             self.plotter.graphWidget.graph.show()
 
@@ -0,0 +1,220 @@
+import os
+import hashlib
+import threading
+import zipfile
+from collections import OrderedDict
+import numpy as np
+from helpers import *
+
+#Part of every key, it has to be increased whenever the arrays stored in an entry
+#or the way they are computed changes, so that entries saved by older code are never served
+cacheVersion=4
+
+class FieldCache():
+    def __init__(self,directory='.fieldcache',maxMemory=256*1024**2):
+        '''
+        A content addressed store for the results of the computation.
+
+        Every entry is a dictionary of named numpy arrays stored under a key,
+        the key being a hash of everything that went into computing the arrays,
+        so the same inputs will always map onto the same entry.
+
+        There are two tiers to the cache,
+        the first is held in memory and is bounded in size, once it grows past maxMemory
+        the least recently used entries are dropped from it.
+        The second is on disk, where every entry is saved as a .npz file,
+        this survives between runs of the program and is consulted when an entry is not in memory.
+
+        The TimeStepper runs the computation on a separate thread, which is why access is guarded by a lock.
+
+        Parameters:
+        directory:
+            The folder in which the on disk tier is stored, set to None to only use the memory tier
+        maxMemory:
+            The maximum size in bytes of the arrays held in memory
+        '''
+        self.directory=directory
+        self.maxMemory=maxMemory
+        self.memoryUsed=0
+        self.entries=OrderedDict()
+        self.lock=threading.Lock()
+        if self.directory is not None:
+            os.makedirs(self.directory,exist_ok=True)
+
+    def key(self,*parts):
+        '''
+        Generates the key for an entry by hashing the given parts,
+        the parts should be plain python values such as strings, numbers and tuples of them.
+        Floats are rounded so that a time reached by repeatedly adding the timeStep
+        maps onto the same entry as one reached by scrubbing back to it.
+        The cacheVersion is always hashed along with the parts.
+        '''
+        def normalize(part):
+            if isinstance(part,(tuple,list)):
+                return tuple(normalize(item) for item in part)
+            if isinstance(part,(float,np.floating)):
+                return round(float(part),10)
+            if isinstance(part,np.integer):
+                return int(part)
+            return part
+        return hashlib.sha256(repr((cacheVersion,)+normalize(parts)).encode()).hexdigest()
+
+    def path(self,key):
+        return os.path.join(self.directory,key+'.npz')
+
+    def get(self,key):
+        '''
+        Returns the dictionary of arrays stored under the key,
+        or None if the key is in neither the memory nor the disk tier.
+        An entry found on disk is promoted into the memory tier.
+        '''
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        if self.directory is None or not os.path.exists(self.path(key)):
+            return None
+        try:
+            with np.load(self.path(key)) as data:
+                arrays={name:data[name] for name in data.files}
+        except (OSError,ValueError,EOFError,zipfile.BadZipFile):
+            #A corrupt or partially written file is treated as a miss and removed so it is written again
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+            return None
+        self.remember(key,arrays)
+        return arrays
+
+    def put(self,key,arrays):
+        '''
+        Stores the dictionary of arrays under the key in both tiers.
+        The file is first written under a temporary name and then moved into place,
+        so that a reader never sees a partially written entry.
+        The disk tier is only a best effort, if the file cannot be written
+        (for example on a read only directory or a full disk) the entry is only kept in memory.
+        '''
+        arrays={name:np.asarray(array) for name,array in arrays.items()}
+        self.remember(key,arrays)
+        if self.directory is not None:
+            temporaryPath=self.path(key)+'.%d.tmp'%threading.get_ident()
+            try:
+                with open(temporaryPath,'wb') as file:
+                    np.savez(file,**arrays)
+                os.replace(temporaryPath,self.path(key))
+            except OSError:
+                try:
+                    os.remove(temporaryPath)
+                except OSError:
+                    pass
+        return arrays
+
+    def remember(self,key,arrays):
+        '''
+        Adds an entry to the memory tier and evicts the least recently used entries
+        until the memory tier fits within maxMemory again.
+        An entry larger than maxMemory on its own is not kept in memory at all.
+        '''
+        size=sum(array.nbytes for array in arrays.values())
+        with self.lock:
+            if key in self.entries:
+                self.memoryUsed-=sum(array.nbytes for array in self.entries.pop(key).values())
+            if size>self.maxMemory:
+                return
+            self.entries[key]=arrays
+            self.memoryUsed+=size
+            while self.memoryUsed>self.maxMemory:
+                oldKey,oldArrays=self.entries.popitem(last=False)
+                self.memoryUsed-=sum(array.nbytes for array in oldArrays.values())
+
+    def clear(self):
+        '''
+        Empties both tiers of the cache,
+        only the files named after a key are removed so anything else in the directory is left alone.
+        '''
+        with self.lock:
+            self.entries.clear()
+            self.memoryUsed=0
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                key=name[:-len('.npz')]
+                if name.endswith('.npz') and len(key)==64 and all(c in '0123456789abcdef' for c in key):
+                    os.remove(os.path.join(self.directory,name))
+
+def meshSpec(mesh,step):
+    '''
+    Describes a mesh generated by generateMesh() by its shape, its bounds and its step size,
+    which is all that is needed to tell two meshes apart without hashing the whole mesh.
+    '''
+    x,y,z=mesh
+    return (x.shape,x.min(),x.max(),y.min(),y.max(),z.min(),z.max(),step)
+
+def cachedSources(cache,mesh,step,time,chargePosExpr,chargeExpr,currentPosExpr,currentExpr):
+    '''
+    Generates the charge and current matrices for the given expressions at the given time,
+    or loads them from the cache if they were computed before.
+
+    This is the same computation as Plot.updateFields() and can be used without the GUI.
+
+    Returns:
+    The key of the entry, the chargeMatrix and the currentMatrix
+    The key identifies the sources and is used to build the key of anything computed from them.
+    '''
+    key=cache.key('sources',meshSpec(mesh,step),time,
+            chargePosExpr,chargeExpr,currentPosExpr,currentExpr)
+    entry=cache.get(key)
+    if entry is None:
+        entry=cache.put(key,{
+            'chargeMatrix':generateChargeMatrix(mesh,time,chargePosExpr,chargeExpr),
+            'currentMatrix':generateCurrentMatrix(mesh,time,currentPosExpr,currentExpr)})
+    return key,entry['chargeMatrix'],entry['currentMatrix']
+
+def cachedPotentials(cache,sourcesKey,mesh,step,epsilon,mu,iterations,
+        chargeMatrix,currentMatrix,solver='jacobi',boundary='periodic'):
+    '''
+    Generates the potentials and the fields that follow from them for a given set of sources,
+    or loads them from the cache if they were computed before.
+
+    The induced electric field is not part of the entry,
+    since it depends on the magnetic potential of the previous frame and not only on the current one.
+    It is computed using inducedElectricField() instead.
+
+    This is the same computation as Plot.updateData() and can be used without the GUI.
+
+    The boundary is applied to the potentials as well as the gradient and curl taken of them,
+    for the multipole boundary the values just outside of the mesh are computed once
+    and shared between the two, see padBoundary().
+
+    Returns:
+    A dictionary with the following arrays
+    potential:
+        The potential of the charges
+    magneticPotential:
+        The potential of the currents
+    electricField:
+        The electric field as the u,v,w components, not yet scaled
+    magneticField:
+        The magnetic field as the u,v,w components, not yet scaled
+    '''
+    key=cache.key('fields',sourcesKey,epsilon,mu,iterations,solver,boundary)
+    entry=cache.get(key)
+    if entry is None:
+        chargeBoundaryValues,currentBoundaryValues=None,None
+        if boundary=='multipole':
+            chargeBoundaryValues=multipoleBoundaryValues(mesh,step,(-1/epsilon)*chargeMatrix)
+            currentBoundaryValues=multipoleBoundaryValues(mesh,step,(-1*mu)*currentMatrix)
+        Potential=generatePotentialMatrix(mesh,step,epsilon,chargeMatrix,iterations,solver,
+                boundary,chargeBoundaryValues)
+        MagneticPotential=generateMagneticPotentialMatrix(
+                mesh,step,mu,epsilon,currentMatrix,iterations,solver=solver,
+                boundary=boundary,boundaryValues=currentBoundaryValues)
+        xe,ye,ze,ue,ve,we=generateElectricField(mesh,Potential,boundary,chargeBoundaryValues)
+        xm,ym,zm,um,vm,wm=generateMagneticField(mesh,step,MagneticPotential,
+                boundary,currentBoundaryValues)
+        entry=cache.put(key,{
+            'potential':Potential,
+            'magneticPotential':MagneticPotential,
+            'electricField':np.asarray([ue,ve,we]),
+            'magneticField':np.asarray([um,vm,wm])})
+    return entry
@@ -1,6 +1,7 @@
 import numpy as np
 import parser
 import re
+from solvers import *
 
 def generateMesh(x1,x2,y1,y2,z1,z2,step):
     '''
@@ -82,13 +83,136 @@ def HSVToRGB(h,s,v):
     
     return (r,g,b)
     
-def inverseLaplacian(laplacianValue,field,step):
+boundaries=['periodic','dirichlet','neumann','multipole']
+solverMethods=['jacobi','direct']
+
+def padBoundary(field,boundary='periodic',boundaryValues=None):
+    '''
+    Surrounds the field with a single layer of ghost points just outside of the mesh,
+    the value of which is decided by the boundary condition.
+    The operators then take the neighbours of every point from the padded field 
+    instead of rolling the field around, so the same boundary is used everywhere.
+
+    periodic:
+        The ghost points wrap around to the other side of the mesh, which is what np.roll does
+    dirichlet:
+        The ghost points are zero, as the field is expected to be zero at infinity
+    neumann:
+        The ghost points repeat the value at the edge of the mesh, so the field does not change across the boundary
+    multipole:
+        The ghost points are set to boundaryValues, 
+        which are usually the far field of the charges or currents from multipoleBoundaryValues()
+        If no boundaryValues are given this is the same as dirichlet.
+
+    Parameters:
+    field:
+        The field over the mesh
+    boundary:
+        One of the boundaries listed above
+    boundaryValues:
+        Matrix of the same shape as the padded field, only its outermost layer is used
+
+    Returns:
+    The field padded by one point on every side
+    '''
+    if boundary=='periodic':
+        return np.pad(field,1,mode='wrap')
+    if boundary=='neumann':
+        return np.pad(field,1,mode='edge')
+    if boundary in ['dirichlet','multipole']:
+        padded=np.pad(field,1)
+        if boundaryValues is not None and boundary!='dirichlet':
+            shell=np.ones(padded.shape,dtype=bool)
+            shell[1:-1,1:-1,1:-1]=False
+            padded[shell]=boundaryValues[shell]
+        return padded
+    raise ValueError('boundary must be one of '+', '.join(boundaries))
+
+def neighbourSum(padded):
+    '''
+    Sums the six neighbours of every point of the mesh from a field padded by padBoundary()
+    '''
+    return (padded[2:,1:-1,1:-1]+padded[:-2,1:-1,1:-1]+
+            padded[1:-1,2:,1:-1]+padded[1:-1,:-2,1:-1]+
+            padded[1:-1,1:-1,2:]+padded[1:-1,1:-1,:-2])
+
+def centralDifference(padded,axis):
+    '''
+    Takes the difference between the next and the previous neighbour of every point along an axis,
+    from a field padded by padBoundary()
+    '''
+    inner=[slice(1,-1)]*3
+    after=list(inner)
+    before=list(inner)
+    after[axis]=slice(2,None)
+    before[axis]=slice(None,-2)
+    return padded[tuple(after)]-padded[tuple(before)]
+
+def multipoleBoundaryValues(mesh,step,laplacianValue):
+    '''
+    Estimates the field just outside of the mesh from the multipole expansion of its laplacian.
+
+    Far away from the charges or currents the field only depends on a few of their moments,
+    the total charge (monopole), its dipole and quadrupole moments.
+    They are computed about the centre of the charges and the field they create in free space
+    is evaluated at the ghost points just outside of the mesh.
+    Using these as the boundary values instead of zero lets the mesh be much closer to the charges
+    without the boundary pulling the field towards zero.
+
+    For ∇²φ=f the free space solution is φ(r)=-1/(4π)∫f(r')/|r-r'|dV',
+    and the expansion of 1/|r-r'| about the centre gives the terms below.
+
+    Parameters:
+    mesh:
+        The mesh on which the computation will occur
+    step:
+        The step size using which the mesh was created
+    laplacianValue:
+        The known value of the laplacian, either a single matrix 
+        or the three components of a vector field stacked along the first axis
+
+    Returns:
+    The boundary values in the shape of the padded field, to be passed on to padBoundary()
+    or the three of them stacked for a vector field
+    '''
+    laplacianValue=np.asarray(laplacianValue)
+    if laplacianValue.ndim==4:
+        return np.asarray([multipoleBoundaryValues(mesh,step,component) 
+            for component in laplacianValue])
+
+    #The co-ordinates of the ghost points follow from extending the mesh by one step on every side
+    paddedMesh=[np.pad(coordinate,1,mode='reflect',reflect_type='odd') for coordinate in mesh]
+    shell=np.ones(paddedMesh[0].shape,dtype=bool)
+    shell[1:-1,1:-1,1:-1]=False
+    result=np.zeros(paddedMesh[0].shape)
+
+    weight=np.abs(laplacianValue)
+    if weight.sum()==0:
+        return result
+    points=np.stack([coordinate.ravel() for coordinate in mesh],axis=1)
+    centre=(points*weight.reshape(-1,1)).sum(axis=0)/weight.sum()
+    volume=step**3
+    f=laplacianValue.reshape(-1)*volume
+    d=points-centre
+    monopole=f.sum()
+    dipole=f@d
+    quadrupole=np.einsum('n,ni,nj->ij',f,d,d)*3-np.eye(3)*(f@np.sum(np.square(d),axis=1))
+
+    R=np.stack([coordinate[shell] for coordinate in paddedMesh],axis=1)-centre
+    distance=np.sqrt(np.sum(np.square(R),axis=1))
+    result[shell]=(-1/(4*np.pi))*(monopole/distance+(R@dipole)/distance**3+
+        np.einsum('ni,ij,nj->n',R,quadrupole,R)/(2*distance**5))
+    return result
+
+def inverseLaplacian(laplacianValue,field,step,boundary='periodic',boundaryValues=None):
     '''
     The following function performs a single inverse laplacian routine,
     for the most accuracy one would ideally have to perform the iteration infinitely many times,
     but for most cases it converges pretty quickly.
 
     It is simply an algebric inverse of the defintion of the discrete numerical laplacian operation.
+    The seven point laplacian is (Σneighbours-6φ)/step², solving it for φ gives the division by 6 below,
+    which is the same operator the direct LaplacianSolver solves exactly.
 
     The use of numpy roll function is to ease the computation, it simply shifts the matrix in a given axis by a given step
     or if you imagine a 2D matrix on a paper, then it rolls the paper into a cylinder and rotates it by a certain step
@@ -96,6 +220,8 @@ def inverseLaplacian(laplacianValue,field,step):
     The use of the roll function does create an issue at the boundaries because it creates periodic boundaries, 
     this would not be ideal for the vast majority of use cases and thus it is recommended to not place charges 
     very close to the boundary of the mesh.
+    The roll has since been replaced by padBoundary() which can also apply other boundaries,
+    periodic is still the default and gives the same result as the roll.
 
     Parameters:
     laplacianValue:
@@ -106,24 +232,60 @@ def inverseLaplacian(laplacianValue,field,step):
         where there is a finite amount of charge or current the field will be zero at infinity.
     step:
         The step size used when creating the mesh needs to be passed on to the computing function.
+    boundary, boundaryValues:
+        The boundary condition to apply at the edges of the mesh, see padBoundary()
 
     Returns:
         The result of a single iteration of the inverseLaplacian operation on the given field.
     '''
     iteratedField=(
-    np.roll(field, -1, axis=0)+np.roll(field, 1, axis=0)+
-    np.roll(field, -1, axis=1)+np.roll(field, 1, axis=1)+
-    np.roll(field, -1, axis=2)+np.roll(field, 1, axis=2)-
-    step**2*laplacianValue)*(1/8)
+    neighbourSum(padBoundary(field,boundary,boundaryValues))-
+    step**2*laplacianValue)*(1/6)
     return iteratedField
 
-def generatePotentialMatrix(mesh,step,epsilon,chargeDensityMatrix,iterations):
+def solveLaplacian(shape,step,laplacianValue,boundary='periodic',boundaryValues=None):
+    '''
+    Solves the laplacian exactly using the LaplacianSolver for the mesh and boundary.
+
+    The multipole boundary shares the dirichlet operator,
+    their non zero values just outside of the mesh are known and are moved over to the laplacianValue.
+
+    Parameters:
+    shape:
+        The shape of the mesh arrays
+    step:
+        The step size using which the mesh was created
+    laplacianValue:
+        Either a single matrix or the three components of a vector field stacked along the first axis
+    boundary, boundaryValues:
+        The boundary condition to apply at the edges of the mesh, see padBoundary()
+    '''
+    if boundary not in boundaries:
+        raise ValueError('boundary must be one of '+', '.join(boundaries))
+    if boundary=='multipole':
+        if boundaryValues is not None:
+            laplacianValue=np.asarray(laplacianValue)
+            if laplacianValue.ndim==4:
+                laplacianValue=laplacianValue-np.asarray([
+                    neighbourSum(padBoundary(np.zeros(shape),boundary,values))
+                    for values in boundaryValues])/step**2
+            else:
+                laplacianValue=laplacianValue-neighbourSum(
+                    padBoundary(np.zeros(shape),boundary,boundaryValues))/step**2
+        boundary='dirichlet'
+    return laplacianSolver(shape,step,boundary).solve(laplacianValue)
+
+def generatePotentialMatrix(mesh,step,epsilon,chargeDensityMatrix,iterations,solver='jacobi',
+        boundary='periodic',boundaryValues=None):
     '''
     Generates the potential from the charges
     It simply generates an initial assumption of zero for the field,
     uses the charge data as the laplacianValue 
     and iterates using the inverseLaplacian function a set number of times
 
+    Alternatively the laplacian can be solved exactly using the LaplacianSolver for the mesh,
+    which is set up once and reused for every later solve on a mesh of the same shape and step.
+
     Parameters:
     mesh:
         The mesh on which the computation will occur
@@ -136,6 +298,17 @@ def generatePotentialMatrix(mesh,step,epsilon,chargeDensityMatrix,iterations):
         is generated via the use of generateChargeMatrix function.
     iterations:
         Number of iterations to be used for the inverseLaplacian
+    solver:
+        Either 'jacobi' to iterate using the inverseLaplacian,
+        or 'direct' to solve using the LaplacianSolver in which case iterations is not used
+    boundary:
+        The boundary condition to apply at the edges of the mesh, see padBoundary()
+    boundaryValues:
+        The values just outside of the mesh for the multipole boundary,
+        they are computed using multipoleBoundaryValues() if not given.
+        The multipole boundary can only be used with the direct solver,
+        a few jacobi iterations leave the inside of the mesh far from converged
+        next to the non zero values just outside of it, which creates a false field at the edges.
         
     Returns:
     The Potential field for a given set of charges
@@ -143,15 +316,23 @@ def generatePotentialMatrix(mesh,step,epsilon,chargeDensityMatrix,iterations):
     See also:
     generateMagneticPotentialMatrix()
     '''
-    potentialField=np.zeros(mesh[0].shape)
+    if solver not in solverMethods:
+        raise ValueError('solver must be one of '+', '.join(solverMethods))
+    if boundary=='multipole' and solver!='direct':
+        raise ValueError("the multipole boundary needs solver='direct'")
     laplacianValue=(-1/epsilon)*chargeDensityMatrix
+    if boundary=='multipole' and boundaryValues is None:
+        boundaryValues=multipoleBoundaryValues(mesh,step,laplacianValue)
+    if solver=='direct':
+        return solveLaplacian(mesh[0].shape,step,laplacianValue,boundary,boundaryValues)
+    potentialField=np.zeros(mesh[0].shape)
     for i in range(iterations):
         potentialField=inverseLaplacian(
-            laplacianValue,potentialField,step)
+            laplacianValue,potentialField,step,boundary,boundaryValues)
     return potentialField
 
 def generateMagneticPotentialMatrix(mesh,step,mu,epsilon,
-        currentDensity,iterations,inducedField=0):
+        currentDensity,iterations,inducedField=0,solver='jacobi',boundary='periodic',boundaryValues=None):
     '''
     Generates a potential from the currents
     It simply generates an initial assumption of zero for the field,
@@ -160,6 +341,7 @@ def generateMagneticPotentialMatrix(mesh,step,mu,epsilon,
     It then uses the current data as the laplacianValue
     and iteraties using the inverseLaplacian seperately on all 3 dimension
     of the vector field a set number of times.
+    With the direct solver all 3 dimensions are solved together in a single set of transforms.
 
     Paramaters:
     mesh:
@@ -177,6 +359,11 @@ def generateMagneticPotentialMatrix(mesh,step,mu,epsilon,
        Number of iterations to be used for the inverseLaplacian function
     inducedField:
         An attempt at account for the induced fields, set by default to zero
+    solver:
+        Either 'jacobi' or 'direct', see generatePotentialMatrix()
+    boundary, boundaryValues:
+        The boundary condition to apply at the edges of the mesh, see generatePotentialMatrix()
+        boundaryValues holds the values for all 3 dimensions stacked together
     
     Returns:
     The potential field for a given set of currents
@@ -184,29 +371,45 @@ def generateMagneticPotentialMatrix(mesh,step,mu,epsilon,
     See also:
     generatePotentialMatrix()
     '''
+    if solver not in solverMethods:
+        raise ValueError('solver must be one of '+', '.join(solverMethods))
+    if boundary=='multipole' and solver!='direct':
+        raise ValueError("the multipole boundary needs solver='direct'")
     meshShape=mesh[0].shape
+    laplacianValue=(-1*mu)*currentDensity+(mu*epsilon)*inducedField
+    if boundary=='multipole' and boundaryValues is None:
+        boundaryValues=multipoleBoundaryValues(mesh,step,laplacianValue)
+    if solver=='direct':
+        return solveLaplacian(meshShape,step,laplacianValue,boundary,boundaryValues)
+    if boundaryValues is None:
+        boundaryValues=[None,None,None]
     magneticPotentialField=np.asarray([
     np.zeros(meshShape),np.zeros(meshShape),np.zeros(meshShape)])
-    laplacianValue=(-1*mu)*currentDensity+(mu*epsilon)*inducedField
     for i in range(iterations):
         result=[]
         for dimension in range(3):
             result.append(inverseLaplacian(
-            laplacianValue[dimension],magneticPotentialField[dimension],step))
+            laplacianValue[dimension],magneticPotentialField[dimension],step,
+            boundary,boundaryValues[dimension]))
         magneticPotentialField=np.asarray(result)
     return magneticPotentialField
 
-def generateElectricField(mesh,potentialField):
+def generateElectricField(mesh,potentialField,boundary='periodic',boundaryValues=None):
     '''
     A function to generate the ElectricField from a given Potential Field,
     It works by simply taking the gradient of the potential field over the given mesh
     to get the Electric Field
 
+    The differences at the edges of the mesh are taken with the given boundary, 
+    which should be the same one that was used to compute the potential, see padBoundary()
+    Like np.gradient which was used before, the differences are not divided by the step size.
+
     See also:
     generateMagneticField()
     '''
     x,y,z=mesh
-    u,v,w=np.gradient(potentialField)
+    padded=padBoundary(potentialField,boundary,boundaryValues)
+    u,v,w=[centralDifference(padded,axis)/2 for axis in range(3)]
     #Changing around the vectors and their directions to make it compatible
     u,v=v,u
     u=-u
@@ -214,23 +417,32 @@ def generateElectricField(mesh,potentialField):
     w=-w
     return (x,y,z,u,v,w)
 
-def curl(field,step):
+def curl(field,step,boundary='periodic',boundaryValues=None):
     '''
     A function that simply takes the curl of the given field with a given step size
-    '''
-    field_u,field_v,field_w=field
+    The differences at the edges of the mesh are taken with the given boundary, see padBoundary()
+    boundaryValues holds the values for all 3 dimensions stacked together
 
-    du_dy=(np.roll(field_u, -1, axis=1)-np.roll(field_u, 1, axis=1))/(2*step)
-    du_dz=(np.roll(field_u, -1, axis=2)-np.roll(field_u, 1, axis=2))/(2*step)
-    dv_dx=(np.roll(field_v, -1, axis=0)-np.roll(field_v, 1, axis=0))/(2*step)
-    dv_dz=(np.roll(field_v, -1, axis=2)-np.roll(field_v, 1, axis=2))/(2*step)
-    dw_dx=(np.roll(field_w, -1, axis=0)-np.roll(field_w, 1, axis=0))/(2*step)
-    dw_dy=(np.roll(field_w, -1, axis=1)-np.roll(field_w, 1, axis=1))/(2*step)
+    The u,v,w components of the field are its x,y,z components,
+    but the mesh generated by np.meshgrid() places the y co-ordinate along the first axis of the arrays
+    and the x co-ordinate along the second, so d/dx is taken along axis 1 and d/dy along axis 0.
+    '''
+    if boundaryValues is None:
+        boundaryValues=[None,None,None]
+    field_u,field_v,field_w=[padBoundary(field[dimension],boundary,boundaryValues[dimension])
+            for dimension in range(3)]
+
+    du_dy=centralDifference(field_u,0)/(2*step)
+    du_dz=centralDifference(field_u,2)/(2*step)
+    dv_dx=centralDifference(field_v,1)/(2*step)
+    dv_dz=centralDifference(field_v,2)/(2*step)
+    dw_dx=centralDifference(field_w,1)/(2*step)
+    dw_dy=centralDifference(field_w,0)/(2*step)
 
     curl=np.asarray([(dw_dy-dv_dz),(du_dz-dw_dx),(dv_dx-du_dy)])
     return curl
 
-def generateMagneticField(mesh,step,potentialField):
+def generateMagneticField(mesh,step,potentialField,boundary='periodic',boundaryValues=None):
     '''
     A function to generate the MagneticField from a given Potential Field,
     It works by simply taking the curl of the potential field over the given mesh
@@ -241,11 +453,8 @@ def generateMagneticField(mesh,step,potentialField):
     '''
 
     x,y,z=mesh
-    u,v,w=curl(potentialField,step)
-    u,v=v,u
-    u=-u
-    v=-v
-    w=-w
+    #curl already accounts for the order of the axes of the mesh so no swapping is needed
+    u,v,w=curl(potentialField,step,boundary,boundaryValues)
     return (x,y,z,u,v,w)
 
 def inducedElectricField(mesh,timeStep,magneticPotentialInitial,
@@ -258,7 +467,6 @@ def inducedElectricField(mesh,timeStep,magneticPotentialInitial,
     u=(magneticPotentialInitial[0]-magneticPotentialFinal[0])/timeStep
     v=(magneticPotentialInitial[1]-magneticPotentialFinal[1])/timeStep
     w=(magneticPotentialInitial[2]-magneticPotentialFinal[2])/timeStep
-    u,v=v,u
     return (x,y,z,u,v,w) 
 
 def inducedMagneticField(mesh,timeStep,electricFieldInitial,electricFieldFinal):
@@ -0,0 +1,110 @@
+import threading
+import numpy as np
+import scipy.fft
+
+def secondDifferenceEigenvalues(size,boundary):
+    '''
+    Returns the eigenvalues of the second difference along a single axis of the given size,
+    the boundary sets what the points just outside of either end are taken to be.
+
+    dirichlet:
+        The points outside are zero, any other value is accounted for in the right hand side.
+        The eigenvectors are sines, so the field is transformed with a type I discrete sine transform
+    neumann:
+        The points outside repeat the value at the end, so the derivative across the boundary is zero.
+        The eigenvectors are cosines, so the field is transformed with a type II discrete cosine transform
+    periodic:
+        The points outside wrap around to the other end, which is what np.roll does.
+        The eigenvectors are complex exponentials, so the field is transformed with a fourier transform
+    '''
+    k=np.arange(size)
+    if boundary=='dirichlet':
+        return -4*np.sin(np.pi*(k+1)/(2*(size+1)))**2
+    if boundary=='neumann':
+        return -4*np.sin(np.pi*k/(2*size))**2
+    if boundary=='periodic':
+        return -4*np.sin(np.pi*k/size)**2
+    raise ValueError("boundary must be one of 'dirichlet', 'neumann' or 'periodic'")
+
+class LaplacianSolver():
+    def __init__(self,shape,step,boundary='dirichlet'):
+        '''
+        Solves the discrete laplacian over a fixed mesh for any number of right hand sides.
+
+        It is the same seven point stencil (Σneighbours-6φ)/step² whose fixed point inverseLaplacian() iterates towards,
+        every point is compared against its two neighbours along each of the three axes.
+        On a uniform box the stencil is diagonalized by a sine, cosine or fourier transform along each axis,
+        depending on the boundary, see secondDifferenceEigenvalues().
+        The eigenvalues only depend on the shape of the mesh, the step size and the boundary,
+        so they are computed once and every solve after that is a forward transform,
+        a division by the eigenvalues and an inverse transform.
+        This is exact and takes O(N log N) operations for N mesh points, without storing any factors.
+
+        With neumann or periodic boundaries the field is only known up to a constant,
+        the constant is chosen so the field has an average of zero,
+        and the average of the right hand side is ignored as no field could have a laplacian with a non zero average.
+
+        Parameters:
+        shape:
+            The shape of the mesh arrays
+        step:
+            The step size using which the mesh was created
+        boundary:
+            Either 'dirichlet', 'neumann' or 'periodic'
+        '''
+        self.shape=tuple(shape)
+        self.step=step
+        self.boundary=boundary
+        axisEigenvalues=[secondDifferenceEigenvalues(size,boundary) for size in self.shape]
+        if boundary=='periodic':
+            #The real fourier transform only keeps the first half of the last axis
+            axisEigenvalues[2]=axisEigenvalues[2][:self.shape[2]//2+1]
+        self.eigenvalues=(axisEigenvalues[0][:,None,None]+axisEigenvalues[1][None,:,None]+
+                axisEigenvalues[2][None,None,:])/step**2
+        if boundary!='dirichlet':
+            #The constant field has the eigenvalue zero, dividing by one leaves its coefficient to be zeroed in solve()
+            self.eigenvalues[0,0,0]=1
+
+    def solve(self,laplacianValue):
+        '''
+        Solves for the field whose laplacian is the given laplacianValue.
+
+        Parameters:
+        laplacianValue:
+            Either a single matrix over the mesh,
+            or several of them stacked along the first axis such as the three components of a vector field,
+            all of them are solved together.
+
+        Returns:
+        The field in the same shape as laplacianValue
+        '''
+        laplacianValue=np.asarray(laplacianValue,dtype=float)
+        axes=(-3,-2,-1)
+        if self.boundary=='dirichlet':
+            transformed=scipy.fft.dstn(laplacianValue,type=1,axes=axes,norm='ortho')
+        elif self.boundary=='neumann':
+            transformed=scipy.fft.dctn(laplacianValue,type=2,axes=axes,norm='ortho')
+        else:
+            transformed=scipy.fft.rfftn(laplacianValue,axes=axes)
+        transformed=transformed/self.eigenvalues
+        if self.boundary!='dirichlet':
+            transformed[...,0,0,0]=0
+        if self.boundary=='dirichlet':
+            return scipy.fft.idstn(transformed,type=1,axes=axes,norm='ortho')
+        if self.boundary=='neumann':
+            return scipy.fft.idctn(transformed,type=2,axes=axes,norm='ortho')
+        return scipy.fft.irfftn(transformed,s=self.shape,axes=axes)
+
+solverLock=threading.Lock()
+laplacianSolvers={}
+
+def laplacianSolver(shape,step,boundary='dirichlet'):
+    '''
+    Returns the LaplacianSolver for a mesh of the given shape, step size and boundary.
+    The solvers are kept in memory for as long as the program runs, so their eigenvalues are only computed once.
+    '''
+    key=(tuple(int(size) for size in shape),round(float(step),10),boundary)
+    with solverLock:
+        if key not in laplacianSolvers:
+            laplacianSolvers[key]=LaplacianSolver(*key)
+        return laplacianSolvers[key]
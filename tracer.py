@@ -0,0 +1,187 @@
+import numpy as np
+
+def linearWeights(index,size):
+    '''
+    Returns the two neighbouring mesh indices of every fractional index along one axis,
+    and the weights with which their values are combined for a linear interpolation.
+    '''
+    lower=np.clip(np.floor(index).astype(int),0,max(size-2,0))
+    t=(index-lower)[:,None]
+    indices=np.clip(lower[:,None]+np.arange(2),0,size-1)
+    weights=np.concatenate([1-t,t],axis=1)
+    return indices,weights
+
+def cubicWeights(index,size):
+    '''
+    Returns the four neighbouring mesh indices of every fractional index along one axis,
+    and the weights with which their values are combined for a cubic interpolation.
+
+    The weights are those of a Catmull-Rom spline, which passes through the values at the mesh points
+    and estimates the slope at each point from its two neighbours.
+    At the edges of the mesh the outermost value is repeated to fill in the missing neighbours.
+    '''
+    lower=np.clip(np.floor(index).astype(int),0,max(size-2,0))
+    t=(index-lower)[:,None]
+    indices=np.clip(lower[:,None]+np.arange(-1,3),0,size-1)
+    weights=np.concatenate([
+        (-t**3+2*t**2-t)/2,
+        (3*t**3-5*t**2+2)/2,
+        (-3*t**3+4*t**2+t)/2,
+        (t**3-t**2)/2],axis=1)
+    return indices,weights
+
+def probeField(mesh,field,points,method='linear',fillValue=np.nan):
+    '''
+    Interpolates a vector field computed on the mesh at an arbitrary set of points.
+
+    All the points are handled at once as array operations,
+    for every point the neighbouring mesh values along each axis are gathered and combined
+    with the weights from linearWeights() or cubicWeights(),
+    which amounts to a trilinear or a tricubic interpolation respectively.
+
+    The mesh is generated by np.meshgrid() which places the x co-ordinate along the second axis
+    and the y co-ordinate along the first axis of the arrays, this is accounted for here.
+
+    Parameters:
+    mesh:
+        The mesh on which the field was computed
+    field:
+        The u,v,w components of the field, for example as returned by generateElectricField()
+        Any number of components can be stacked together to interpolate them in one go
+    points:
+        Array of shape (N,3) containing the x,y,z co-ordinates of the points
+    method:
+        Either 'linear' or 'cubic'
+    fillValue:
+        The value returned for points that lie outside of the mesh
+
+    Returns:
+    Array of shape (N,3) containing the u,v,w components of the field at every point,
+    or (N,C) for a field with C components
+    '''
+    x,y,z=mesh
+    field=np.asarray(field)
+    points=np.atleast_2d(np.asarray(points,dtype=float))
+    if method=='linear':
+        axisWeights=linearWeights
+    elif method=='cubic':
+        axisWeights=cubicWeights
+    else:
+        raise ValueError("method must be either 'linear' or 'cubic'")
+
+    #Converting the co-ordinates to fractional indices in the order of the array axes
+    origin=np.array([y[0,0,0],x[0,0,0],z[0,0,0]])
+    spacing=np.array([y[min(1,y.shape[0]-1),0,0],x[0,min(1,x.shape[1]-1),0],
+        z[0,0,min(1,z.shape[2]-1)]])-origin
+    spacing[spacing==0]=1
+    index=(points[:,[1,0,2]]-origin)/spacing
+    shape=np.array(x.shape)
+    outside=np.any((index<0)|(index>shape-1),axis=1)
+
+    iy,wy=axisWeights(index[:,0],shape[0])
+    ix,wx=axisWeights(index[:,1],shape[1])
+    iz,wz=axisWeights(index[:,2],shape[2])
+    #Flattening the neighbourhood of every point so all components are gathered with a single take
+    flatIndex=((iy[:,:,None,None]*shape[1]+ix[:,None,:,None])*shape[2]+iz[:,None,None,:]).reshape(len(points),-1)
+    weights=(wy[:,:,None,None]*wx[:,None,:,None]*wz[:,None,None,:]).reshape(len(points),-1)
+    neighbourhood=field.reshape(field.shape[0],-1)[:,flatIndex]
+    result=np.einsum('cnm,nm->nc',neighbourhood,weights)
+    result[outside]=fillValue
+    return result
+
+def borisPush(positions,velocities,electricField,magneticField,chargeToMass,timeStep):
+    '''
+    Advances a set of charged particles by a single time step using the Boris method.
+
+    The velocity is first given half of the kick from the electric field,
+    then rotated by the magnetic field and finally given the other half of the kick.
+    The rotation does not change the speed of the particle,
+    so unlike a simple Euler step the method does not gain or lose energy in a magnetic field.
+
+    Parameters:
+    positions, velocities:
+        Arrays of shape (N,3)
+    electricField, magneticField:
+        Arrays of shape (N,3) containing the fields at the position of every particle
+    chargeToMass:
+        The charge to mass ratio, either a single value or an array of shape (N,)
+    timeStep:
+        The time step to advance the particles by
+
+    Returns:
+    The new positions and velocities
+    '''
+    factor=np.reshape(chargeToMass,(-1,1))*timeStep/2
+    halfKick=factor*electricField
+    vMinus=velocities+halfKick
+    t=factor*magneticField
+    s=2*t/(1+np.sum(np.square(t),axis=1,keepdims=True))
+    vPrime=vMinus+np.cross(vMinus,t)
+    vPlus=vMinus+np.cross(vPrime,s)
+    velocities=vPlus+halfKick
+    positions=positions+velocities*timeStep
+    return positions,velocities
+
+def traceParticles(mesh,electricField,magneticField,positions,velocities,
+        charge,mass,timeStep,steps,method='linear'):
+    '''
+    Traces a batch of charged particles through the computed electric and magnetic fields.
+
+    At every step the fields are probed at the position of all the particles using probeField()
+    and all the particles are advanced together using borisPush(),
+    so the cost of a step grows with the number of particles only through the array operations.
+
+    The fields are taken to be constant over the time the particles are traced.
+    A particle whose next step would take it outside of the mesh is stopped at its last position inside the mesh,
+    since the fields are not known outside of it.
+    The fields have to be the derivatives per unit length of the mesh co-ordinates,
+    like the ones stored by Plot.updateData() and unlike generateElectricField() which does not divide by the step size.
+
+    Parameters:
+    mesh:
+        The mesh on which the fields were computed
+    electricField, magneticField:
+        The u,v,w components of the fields
+    positions, velocities:
+        Arrays of shape (N,3) with the initial state of the particles
+    charge, mass:
+        Either a single value or an array of shape (N,)
+    timeStep:
+        The time step to advance the particles by
+    steps:
+        Number of steps to trace the particles for
+    method:
+        The interpolation used for the fields, either 'linear' or 'cubic'
+
+    Returns:
+    trajectory:
+        Array of shape (steps+1,N,3) containing the positions of the particles at every step
+    velocities:
+        Array of shape (N,3) with the final velocities
+    active:
+        Boolean array of shape (N,) which is False for the particles that were stopped at the edge of the mesh
+    '''
+    x,y,z=mesh
+    lower=np.array([x.min(),y.min(),z.min()])
+    upper=np.array([x.max(),y.max(),z.max()])
+    positions=np.array(positions,dtype=float,ndmin=2)
+    velocities=np.array(velocities,dtype=float,ndmin=2)
+    chargeToMass=np.broadcast_to(np.asarray(charge,dtype=float)/np.asarray(mass,dtype=float),
+        (positions.shape[0],))
+    active=np.ones(positions.shape[0],dtype=bool)
+    trajectory=np.empty((steps+1,)+positions.shape)
+    trajectory[0]=positions
+    #Both fields are interpolated together since they share the same weights
+    fields=np.concatenate([np.asarray(electricField),np.asarray(magneticField)])
+    for step in range(steps):
+        probed=probeField(mesh,fields,positions,method)
+        E,B=probed[:,:3],probed[:,3:]
+        newPositions,newVelocities=borisPush(positions,velocities,
+            np.nan_to_num(E),np.nan_to_num(B),chargeToMass,timeStep)
+        #A step is only taken if the particle started and ends up inside of the mesh
+        inside=np.all((newPositions>=lower)&(newPositions<=upper),axis=1)
+        active&=~np.isnan(E[:,0])&inside
+        positions=np.where(active[:,None],newPositions,positions)
+        velocities=np.where(active[:,None],newVelocities,velocities)
+        trajectory[step+1]=positions
+    return trajectory,velocities,active
@@ -1,5 +1,7 @@
 from PyQt5.QtWidgets import *
 from helpers import *
+from cache import *
+from tracer import *
 import numpy as np
 from vispy import app, visuals, scene
 from pprint import pprint
@@ -12,6 +14,7 @@ class Plot():
         '''
         self.setupCanvas()
         self.initialPlot=True
+        self.cache=FieldCache()
     def setupCanvas(self):
         '''
         Does basic setup inculding the plot enviornment and the XYZ Axis lines,
@@ -85,11 +88,14 @@ class Plot():
         Returns:
         None
         But stores the generated matrices in self object
+
+        The matrices are looked up in self.cache first and only computed if they are not found.
         '''
-        self.chargeMatrix=generateChargeMatrix(self.mesh,self.time,chargePosExpr,chargeExpr)
-        self.currentMatrix=generateCurrentMatrix(self.mesh,self.time,currentPosExpr,currentExpr)
+        self.sourcesKey,self.chargeMatrix,self.currentMatrix=cachedSources(
+                self.cache,self.mesh,self.stepSize,self.time,
+                chargePosExpr,chargeExpr,currentPosExpr,currentExpr)
 
-    def updateData(self,epsilon,mu,iterations):
+    def updateData(self,epsilon,mu,iterations,solver='jacobi',boundary='periodic'):
         '''
         Generates the final co-ordinate data and vector data based on the charge and current Matrices,
         and then stores them in the self object
@@ -101,20 +107,23 @@ class Plot():
             Physical constant for currents, set to 1 for most demonstration purposes
         iterations:
             Number of iterations to complete in the computation process for the fields
+        solver:
+            Either 'jacobi' to iterate a number of times or 'direct' to solve exactly,
+            see generatePotentialMatrix()
+        boundary:
+            The boundary condition at the edges of the mesh, see padBoundary()
 
         Returns:
         None
         But stores co-ordinate data in xMatrix,yMatrix,zMatrix
         and vector data in uMatrix,vMatrix,wMatrix of the self object
-        '''
-        #Generating the Potentials
-        Potential=generatePotentialMatrix(self.mesh,self.stepSize,epsilon,self.chargeMatrix,iterations)
-        MagneticPotential=generateMagneticPotentialMatrix(
-                self.mesh,self.stepSize,mu,epsilon,self.currentMatrix,iterations)
 
-        #Generating the fields
-        xe,ye,ze,ue,ve,we=generateElectricField(self.mesh,Potential)
-        xm,ym,zm,um,vm,wm=generateMagneticField(self.mesh,self.stepSize,MagneticPotential)
+        The potentials and fields are looked up in self.cache first and only computed if they are not found.
+        '''
+        #Generating the Potentials and the fields
+        computed=cachedPotentials(self.cache,self.sourcesKey,self.mesh,self.stepSize,
+                epsilon,mu,iterations,self.chargeMatrix,self.currentMatrix,solver,boundary)
+        MagneticPotential=computed['magneticPotential']
         
         #An attempt at finding the induced Electric Field
         xei,yei,zei,uei,vei,wei=inducedElectricField(self.mesh,self.timeStep,self.MagneticPotential,MagneticPotential)
@@ -122,14 +131,49 @@ class Plot():
         #Storing the Magnetic potential for current time to be reused for induced Electric Field calcs later
         self.MagneticPotential=MagneticPotential
 
-        #One can and should simply use the co-ordinate data from a single field
-        #This is because all the fields are computed on the same mesh at present
-        self.xMatrix=xe# or xm
-        self.yMatrix=ye# or ym
-        self.zMatrix=ze# or zm
-        self.uMatrix=(ue+um+uei)*self.scale
-        self.vMatrix=(ve+vm+vei)*self.scale
-        self.wMatrix=(we+wm+wei)*self.scale
+        #Storing the unscaled fields so they can be probed and used for tracing particles
+        #generateElectricField does not divide by the step size while the curl does,
+        #so the Electric Field is divided here to give both fields per unit length of the mesh co-ordinates
+        self.electricField=computed['electricField']/self.stepSize+np.asarray([uei,vei,wei])
+        self.magneticField=computed['magneticField']
+        u,v,w=computed['electricField']+np.asarray([uei,vei,wei])+self.magneticField
+
+        #All the fields are computed on the same mesh at present so its co-ordinates are used directly
+        self.xMatrix,self.yMatrix,self.zMatrix=self.mesh
+        self.uMatrix=u*self.scale
+        self.vMatrix=v*self.scale
+        self.wMatrix=w*self.scale
+
+    def probeFields(self,points,method='linear'):
+        '''
+        Interpolates the fields generated by updateData() at an arbitrary set of points
+
+        Parameters:
+        points:
+            Array of shape (N,3) containing the x,y,z co-ordinates of the points
+        method:
+            Either 'linear' or 'cubic' for a trilinear or a tricubic interpolation
+
+        Returns:
+        The electric and the magnetic field at the points, each as an array of shape (N,3)
+        Both fields are derivatives per unit length of the mesh co-ordinates,
+        the same as the vectors plotted except that the plotted Electric Field is not divided by the step size
+
+        See also:
+        tracer.probeField()
+        '''
+        return (probeField(self.mesh,self.electricField,points,method),
+                probeField(self.mesh,self.magneticField,points,method))
+
+    def traceParticles(self,positions,velocities,charge,mass,timeStep,steps,method='linear'):
+        '''
+        Traces a batch of charged particles through the fields generated by updateData()
+
+        See also:
+        tracer.traceParticles()
+        '''
+        return traceParticles(self.mesh,self.electricField,self.magneticField,
+                positions,velocities,charge,mass,timeStep,steps,method)
 
     def processData(self):
         '''